@@ -1,15 +1,71 @@
 import uuid
+import itertools
+from collections import defaultdict
 import streamlit as st
 from datetime import datetime
-from typing import List, Dict, Any
-from src.aws_agent_chatbot import AWSAgentChatbot
-from src.utilities.utils import display_content_with_formatting, format_file_size
+from typing import List, Dict, Any, Iterator, Tuple
+from src.utilities.constants import AWS_REGIONS, NAV_PAGES, NAV_INDEX, AWS_ACCESS_KEY_RE, AWS_SECRET_KEY_RE
+from src.utilities.utils import (
+    BACKGROUND_EXECUTOR, WARMUP_EXECUTOR, display_content_with_formatting, format_file_size, unescape_stream,
+    with_script_run_ctx
+)
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _chatbot_module():
+    """Import the chatbot module (and boto3 with it) on first use so the login form paints first.
+
+    After the first import the module comes from sys.modules, so later calls, including those
+    from later reruns of this script, are a cheap lookup.
+    """
+    from src import aws_agent_chatbot
+    return aws_agent_chatbot
+
+# Files rendered per folder page in File Management
+FILES_PAGE_SIZE = 50
+
+def new_conversation_context(current_agent: str = None) -> Dict[str, Any]:
+    """Fresh conversation context tracking for a new session"""
+    return {
+        'current_agent': current_agent,
+        'session_start_time': datetime.now(),
+        'message_count': 0,
+        'last_agent_switch': None
+    }
+
+def set_agents(agents: List[Dict[str, Any]]):
+    """Store the agent list with lookup indexes so reruns avoid linear scans"""
+    st.session_state.agents = agents
+    st.session_state.agents_by_id = {agent['agentId']: agent for agent in agents}
+    st.session_state.agent_index_by_id = {agent['agentId']: i for i, agent in enumerate(agents)}
+    # Aliases may have changed along with the agents
+    st.session_state.newest_alias_by_agent = {}
+    st.session_state.alias_options_by_agent = {}
+
+def newest_alias(agent_id: str, aliases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Most recently updated (or created) alias of an agent, computed once per agent list"""
+    cache = st.session_state.newest_alias_by_agent
+    if agent_id not in cache:
+        cache[agent_id] = max(aliases, key=lambda x: x.get('lastUpdatedDateTime', x.get('creationDateTime', '')))
+    return cache[agent_id]
+
+def alias_options(agent_id: str, aliases: List[Dict[str, Any]]) -> Tuple[Dict[str, str], List[str], Dict[str, int]]:
+    """Alias selectbox label-to-ID map, labels and index by alias ID, built once per agent list"""
+    cache = st.session_state.alias_options_by_agent
+    if agent_id not in cache:
+        label_to_id = {f"{alias['agentAliasName']} ({alias['agentAliasId']})": alias['agentAliasId'] for alias in aliases}
+        index_by_id = {alias_id: i for i, alias_id in enumerate(label_to_id.values())}
+        cache[agent_id] = (label_to_id, list(label_to_id), index_by_id)
+    return cache[agent_id]
+
+def start_agent_warmup(client, agent_id: str, agent_alias_id: str):
+    """Warm up an agent in the background; the result is ignored"""
+    if agent_alias_id:
+        st.session_state._warmup_future = WARMUP_EXECUTOR.submit(client.warm_up_agent, agent_id, agent_alias_id)
+
 def init_session_state():
     """Initialize Streamlit session state"""
     # Initialize the chatbot
@@ -17,7 +73,7 @@ def init_session_state():
         st.session_state.chatbot = None
 
     if 'agents' not in st.session_state:
-        st.session_state.agents = []
+        set_agents([])
 
     if 'selected_agent' not in st.session_state:
         st.session_state.selected_agent = None
@@ -35,12 +91,7 @@ def init_session_state():
     
     # Add conversation context tracking
     if 'conversation_context' not in st.session_state:
-        st.session_state.conversation_context = {
-            'current_agent': None,
-            'session_start_time': datetime.now(),
-            'message_count': 0,
-            'last_agent_switch': None
-        }
+        st.session_state.conversation_context = new_conversation_context()
 
 def setup_sidebar():
     """Setup sidebar for AWS configuration and navigation"""
@@ -60,11 +111,17 @@ def setup_sidebar():
         # AWS Region
         region = st.sidebar.selectbox(
             "AWS Region",
-            ["us-west-2", "us-east-1", "eu-west-1", "ap-southeast-1"],
+            AWS_REGIONS,
             index=0,
             help="Select the region where your Bedrock Agent is deployed"
         )
         
+        latency_optimized = st.sidebar.checkbox(
+            "⚡ Latency-optimized inference",
+            value=True,
+            help="Request Bedrock's latency-optimized inference for supported models"
+        )
+        
         # Credentials input
         st.sidebar.subheader("AWS Credentials")
         cred_method = st.sidebar.radio(
@@ -80,9 +137,9 @@ def setup_sidebar():
             aws_secret_key = st.sidebar.text_input("AWS Secret Access Key", type="password", help="Enter your AWS Secret Access Key")
             
             # Validate credential format
-            if aws_access_key and not aws_access_key.startswith('AKIA'):
-                st.sidebar.warning("⚠️ Access Key ID should start with 'AKIA'")
-            if aws_secret_key and len(aws_secret_key) != 40:
+            if aws_access_key and not AWS_ACCESS_KEY_RE.match(aws_access_key):
+                st.sidebar.warning("⚠️ Access Key ID should be 20 characters starting with 'AKIA'")
+            if aws_secret_key and not AWS_SECRET_KEY_RE.match(aws_secret_key):
                 st.sidebar.warning("⚠️ Secret Access Key should be 40 characters long")
         
         # Connect button
@@ -92,19 +149,20 @@ def setup_sidebar():
                 if not aws_access_key or not aws_secret_key:
                     st.sidebar.error("❌ Please provide both Access Key ID and Secret Access Key")
                     return
-                if not aws_access_key.startswith('AKIA'):
+                if not AWS_ACCESS_KEY_RE.match(aws_access_key):
                     st.sidebar.error("❌ Invalid Access Key ID format")
                     return
-                if len(aws_secret_key) != 40:
+                if not AWS_SECRET_KEY_RE.match(aws_secret_key):
                     st.sidebar.error("❌ Invalid Secret Access Key format")
                     return
             
             try:
                 with st.spinner("Connecting to AWS Bedrock Agents..."):
-                    client = AWSAgentChatbot(
+                    client = _chatbot_module().get_chatbot(
                         region_name=region,
                         aws_access_key_id=aws_access_key,
-                        aws_secret_access_key=aws_secret_key
+                        aws_secret_access_key=aws_secret_key,
+                        performance_config="optimized" if latency_optimized else "standard"
                     )
                     
                     # Test the connection and credentials
@@ -112,6 +170,8 @@ def setup_sidebar():
                     
                     if test_result['status'] == 'error':
                         st.sidebar.error(f"❌ Connection test failed: {test_result['error']}")
+                        # Drop cached clients so a retry picks up refreshed credentials
+                        _chatbot_module().get_chatbot.clear()
                         
                         # Show debug information for troubleshooting
                         with st.sidebar.expander("🔧 Debug Information", expanded=False):
@@ -134,7 +194,7 @@ def setup_sidebar():
                         st.sidebar.warning("⚠️ No agents found. Please ensure you have agents created in AWS Bedrock.")
                     
                     st.session_state.chatbot = client
-                    st.session_state.agents = agents
+                    set_agents(agents)
                     st.session_state.is_logged_in = True
                     
                     # Store connection info (without credentials)
@@ -152,12 +212,10 @@ def setup_sidebar():
                         first_agent = agents[0]
                         aliases = client.list_agent_aliases(first_agent['agentId'])
                         if aliases:
-                            # Sort aliases by creation date (newest first)
-                            sorted_aliases = sorted(aliases, 
-                                key=lambda x: x.get('lastUpdatedDateTime', x.get('creationDateTime', '')), 
-                                reverse=True)
-                            st.session_state.chat_alias_id = sorted_aliases[0]['agentAliasId']
+                            st.session_state.chat_alias_id = newest_alias(first_agent['agentId'], aliases)['agentAliasId']
                             st.session_state.selected_agent = first_agent
+                            # Absorb the agent's cold start before the first real message
+                            start_agent_warmup(client, first_agent['agentId'], st.session_state.chat_alias_id)
                     
                     st.sidebar.success("✅ Connected successfully!")
                     st.rerun()
@@ -200,16 +258,11 @@ def setup_sidebar():
                 # Clear session state
                 st.session_state.is_logged_in = False
                 st.session_state.chatbot = None
-                st.session_state.agents = []
+                set_agents([])
                 st.session_state.selected_agent = None
                 st.session_state.messages = []
                 st.session_state.session_id = str(uuid.uuid4())
-                st.session_state.conversation_context = {
-                    'current_agent': None,
-                    'session_start_time': datetime.now(),
-                    'message_count': 0,
-                    'last_agent_switch': None
-                }
+                st.session_state.conversation_context = new_conversation_context()
                 if 'connection_info' in st.session_state:
                     del st.session_state.connection_info
                 st.success("Disconnected successfully!")
@@ -223,10 +276,10 @@ def setup_sidebar():
             # Use on_change callback for the radio button
             st.radio(
                 "Go to",
-                ["🤖 Agents", "💬 Chat", "📈 History", "📚 Knowledge Base"],
+                NAV_PAGES,
                 key="nav_radio",
                 on_change=on_page_change,
-                index=["🤖 Agents", "💬 Chat", "📈 History", "📚 Knowledge Base"].index(st.session_state.selected_page)
+                index=NAV_INDEX[st.session_state.selected_page]
             )
             
             # Show agent info if selected
@@ -255,16 +308,20 @@ def setup_sidebar():
             
             # Session management
             st.header("🔄 Session")
+            reset_agent_memory = st.checkbox(
+                "Also reset agent memory",
+                value=False,
+                help="Start a new Bedrock session id so the agent forgets the previous conversation"
+            )
             if st.button("New Session"):
-                st.session_state.session_id = str(uuid.uuid4())
+                # Keeping the session id preserves the agent's server-side conversation memory
+                if reset_agent_memory:
+                    st.session_state.session_id = str(uuid.uuid4())
                 st.session_state.messages = []
                 # Reset conversation context
-                st.session_state.conversation_context = {
-                    'current_agent': st.session_state.selected_agent['agentId'] if st.session_state.selected_agent else None,
-                    'session_start_time': datetime.now(),
-                    'message_count': 0,
-                    'last_agent_switch': None
-                }
+                st.session_state.conversation_context = new_conversation_context(
+                    st.session_state.selected_agent['agentId'] if st.session_state.selected_agent else None
+                )
                 st.success("New session started!")
             
             st.caption(f"Session ID: {st.session_state.session_id[:8]}...")
@@ -279,23 +336,27 @@ def setup_sidebar():
 
 def display_agents_section():
     """Display available agents section with detailed agent analysis"""
-    st.header("🤖 Available Agents")
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.header("🤖 Available Agents")
+    with col2:
+        # Agent lookups are cached for a few minutes; allow a manual refresh
+        if st.button("🔄 Refresh", help="Reload agents and aliases from AWS"):
+            st.session_state.chatbot.clear_agent_cache()
+            set_agents(st.session_state.chatbot.list_agents())
+            st.rerun()
     
     if not st.session_state.agents:
         st.info("No agents found. Please ensure you have agents created in AWS Bedrock.")
         return
     
-    # Create agent selection
-    agent_options = [f"{agent['agentName']} ({agent['agentId']})" for agent in st.session_state.agents]
+    # Create agent selection; options are agent IDs so the selection survives a rename and Refresh
+    agent_options = list(st.session_state.agents_by_id)
     
     # Find current agent index
     current_index = 0
     if st.session_state.selected_agent:
-        current_index = next(
-            (i for i, opt in enumerate(agent_options) 
-             if st.session_state.selected_agent['agentId'] in opt),
-            0
-        )
+        current_index = st.session_state.agent_index_by_id.get(st.session_state.selected_agent['agentId'], 0)
     
     # Track previous selection
     if 'previous_agent_selection' not in st.session_state:
@@ -305,21 +366,23 @@ def display_agents_section():
         "Select an Agent",
         agent_options,
         index=current_index,
+        format_func=lambda agent_id: f"{st.session_state.agents_by_id[agent_id]['agentName']} ({agent_id})",
         key="agent_selection"
     )
     
     # Only update if selection changed
     if selected_agent_option != st.session_state.previous_agent_selection:
         st.session_state.previous_agent_selection = selected_agent_option
-        # Extract agent ID from selection
-        agent_id = selected_agent_option.split('(')[-1].strip(')')
-        selected_agent = next(agent for agent in st.session_state.agents if agent['agentId'] == agent_id)
+        agent_id = selected_agent_option
+        selected_agent = st.session_state.agents_by_id[agent_id]
         previous_agent_name = st.session_state.selected_agent['agentName'] if st.session_state.selected_agent else None
         st.session_state.selected_agent = selected_agent
         
         # Update conversation context for agent switch
         st.session_state.conversation_context['last_agent_switch'] = datetime.now()
         st.session_state.conversation_context['current_agent'] = agent_id
+        # Warm up the new agent once its alias is resolved below
+        st.session_state._warmup_pending = agent_id
         
         # Add context message about agent change
         if previous_agent_name and st.session_state.messages:
@@ -334,34 +397,36 @@ def display_agents_section():
         st.rerun()
 
     if selected_agent_option:
-        # Extract agent ID from selection
-        agent_id = selected_agent_option.split('(')[-1].strip(')')
+        agent_id = selected_agent_option
         if not st.session_state.selected_agent or st.session_state.selected_agent['agentId'] != agent_id:
-            selected_agent = next(agent for agent in st.session_state.agents if agent['agentId'] == agent_id)
-            st.session_state.selected_agent = selected_agent
+            st.session_state.selected_agent = st.session_state.agents_by_id[agent_id]
         agent_name = st.session_state.selected_agent['agentName']
 
+        # Fetch aliases and agent details concurrently; they are independent round-trips
+        aliases_future = BACKGROUND_EXECUTOR.submit(
+            with_script_run_ctx(st.session_state.chatbot.list_agent_aliases), agent_id
+        )
+        details_future = BACKGROUND_EXECUTOR.submit(
+            with_script_run_ctx(st.session_state.chatbot.get_agent_details), agent_id
+        )
+
         # Load agent aliases and select newest by default
         try:
-            aliases = st.session_state.chatbot.list_agent_aliases(agent_id)
+            aliases = aliases_future.result()
             st.session_state.agent_aliases = aliases
             
             if aliases:
-                # Sort aliases by creation date (newest first)
-                sorted_aliases = sorted(aliases, 
-                    key=lambda x: x.get('lastUpdatedDateTime', x.get('creationDateTime', '')), 
-                    reverse=True)
-                newest_alias = sorted_aliases[0]
+                latest_alias = newest_alias(agent_id, aliases)
                 
                 # Initialize use_latest in session state if not present
                 if 'use_latest_alias' not in st.session_state:
                     st.session_state.use_latest_alias = True
-                    st.session_state.chat_alias_id = newest_alias['agentAliasId']
+                    st.session_state.chat_alias_id = latest_alias['agentAliasId']
                 
                 # Add toggle for testing different aliases
                 col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.info(f"🔄 Latest alias: {newest_alias['agentAliasName']}")
+                    st.info(f"🔄 Latest alias: {latest_alias['agentAliasName']}")
                 with col2:
                     # Handle toggle state change
                     previous_state = st.session_state.use_latest_alias
@@ -376,30 +441,24 @@ def display_agents_section():
                     if current_state != previous_state:
                         st.session_state.use_latest_alias = current_state
                         if current_state:  # If switching to latest
-                            st.session_state.chat_alias_id = newest_alias['agentAliasId']
+                            st.session_state.chat_alias_id = latest_alias['agentAliasId']
                         st.rerun()
                 
                 if st.session_state.use_latest_alias:
-                    if st.session_state.chat_alias_id != newest_alias['agentAliasId']:
-                        st.session_state.chat_alias_id = newest_alias['agentAliasId']
+                    if st.session_state.chat_alias_id != latest_alias['agentAliasId']:
+                        st.session_state.chat_alias_id = latest_alias['agentAliasId']
                 else:
-                    alias_options = [f"{alias['agentAliasName']} ({alias['agentAliasId']})" for alias in aliases]
+                    alias_label_to_id, alias_labels, alias_index_by_id = alias_options(agent_id, aliases)
                     # Find current index for the selectbox
-                    current_index = 0
-                    if st.session_state.chat_alias_id:
-                        current_index = next(
-                            (i for i, opt in enumerate(alias_options) 
-                             if st.session_state.chat_alias_id in opt),
-                            0
-                        )
+                    current_index = alias_index_by_id.get(st.session_state.chat_alias_id, 0)
                     
                     # Handle alias selection change
                     if 'previous_alias_selection' not in st.session_state:
-                        st.session_state.previous_alias_selection = alias_options[current_index]
+                        st.session_state.previous_alias_selection = alias_labels[current_index]
                     
                     selected_alias_option = st.selectbox(
                         "Select an alias for testing:",
-                        alias_options,
+                        alias_labels,
                         index=current_index,
                         key="agent_section_alias"
                     )
@@ -407,7 +466,7 @@ def display_agents_section():
                     # If selection changed, update and rerun
                     if selected_alias_option != st.session_state.previous_alias_selection:
                         st.session_state.previous_alias_selection = selected_alias_option
-                        selected_alias_id = selected_alias_option.split('(')[-1].strip(')')
+                        selected_alias_id = alias_label_to_id[selected_alias_option]
                         if st.session_state.chat_alias_id != selected_alias_id:
                             st.session_state.chat_alias_id = selected_alias_id
                             st.rerun()
@@ -449,10 +508,14 @@ def display_agents_section():
         except Exception as e:
             st.error(f"Error loading agent aliases: {str(e)}")
         
+        if st.session_state.get('_warmup_pending') == agent_id:
+            st.session_state._warmup_pending = None
+            start_agent_warmup(st.session_state.chatbot, agent_id, st.session_state.get('chat_alias_id'))
+        
         # Display detailed agent information
         try:
             # Get detailed agent information
-            agent_details = st.session_state.chatbot.get_agent_details(agent_id)
+            agent_details = details_future.result()
             
             # Display detailed information
             display_agent_details(agent_name, agent_details)
@@ -489,40 +552,81 @@ def display_agent_details(agent_name: str, agent_details: Dict[str, Any]):
     
     col1, col2 = st.columns(2)
     
+    # Each column is emitted as one Markdown block instead of one element per bullet
     with col1:
-        st.markdown("**Agent Configuration**")
-        st.write(f"- 🆔 ID: `{agent_id}`")
         status_color = "green" if agent_status == "Active" else "orange"
-        st.markdown(f"- 📊 Status: <span style='color: {status_color}'>{agent_status}</span>", unsafe_allow_html=True)
+        config_lines = [
+            "**Agent Configuration**",
+            f"- 🆔 ID: `{agent_id}`",
+            f"- 📊 Status: <span style='color: {status_color}'>{agent_status}</span>"
+        ]
         if agent_details.get('foundationModel'):
-            st.write(f"- 🧠 Model: `{agent_details['foundationModel']}`")
+            config_lines.append(f"- 🧠 Model: `{agent_details['foundationModel']}`")
         if agent_details.get('inferenceConfiguration'):
             inference = agent_details['inferenceConfiguration']
             if inference.get('temperature'):
-                st.write(f"- 🌡️ Temperature: {inference['temperature']}")
+                config_lines.append(f"- 🌡️ Temperature: {inference['temperature']}")
             if inference.get('topP'):
-                st.write(f"- 📊 Top P: {inference['topP']}")
+                config_lines.append(f"- 📊 Top P: {inference['topP']}")
             if inference.get('maxTokens'):
-                st.write(f"- 📝 Max Tokens: {inference['maxTokens']}")
+                config_lines.append(f"- 📝 Max Tokens: {inference['maxTokens']}")
+        st.markdown("\n".join(config_lines), unsafe_allow_html=True)
     
     with col2:
-        st.markdown("**Timestamps**")
+        timestamp_lines = ["**Timestamps**"]
         if creation_date:
-            st.write(f"- 📅 Created: {creation_date.strftime('%Y-%m-%d %H:%M:%S UTC') if isinstance(creation_date, datetime) else creation_date}")
+            timestamp_lines.append(f"- 📅 Created: {creation_date.strftime('%Y-%m-%d %H:%M:%S UTC') if isinstance(creation_date, datetime) else creation_date}")
         if last_update:
-            st.write(f"- 🔄 Last Updated: {last_update.strftime('%Y-%m-%d %H:%M:%S UTC') if isinstance(last_update, datetime) else last_update}")
+            timestamp_lines.append(f"- 🔄 Last Updated: {last_update.strftime('%Y-%m-%d %H:%M:%S UTC') if isinstance(last_update, datetime) else last_update}")
         if agent_details.get('idleSessionTTLInSeconds'):
-            st.write(f"- ⏱️ Session TTL: {agent_details['idleSessionTTLInSeconds']}s")
+            timestamp_lines.append(f"- ⏱️ Session TTL: {agent_details['idleSessionTTLInSeconds']}s")
+        st.markdown("\n".join(timestamp_lines))
 
     if capabilities:
-        st.markdown("**🚀 Capabilities**")
-        for capability in capabilities:
-            st.write(f"- {capability}")
+        st.markdown("\n".join(["**🚀 Capabilities**"] + [f"- {capability}" for capability in capabilities]))
     
     if agent_details.get('instruction'):
         st.markdown("**📝 Agent Instructions**")
         st.code(agent_details['instruction'], language="markdown")
 
+def agent_history(agent_id: str, history: List[Dict]) -> List[Dict]:
+    """History to replay to an agent: only the first time it sees this session, since
+    Bedrock keeps the conversation server-side per session id afterwards"""
+    if agent_id in st.session_state.conversation_context.setdefault('primed_agents', set()):
+        return None
+    return history
+
+def mark_agent_primed(agent_id: str):
+    """Record that an agent received the replayed history; call only once it has answered without error"""
+    st.session_state.conversation_context.setdefault('primed_agents', set()).add(agent_id)
+
+def agent_session_attributes() -> Dict[str, str]:
+    """Small session metadata sent with each turn instead of the full history"""
+    last_switch = st.session_state.conversation_context['last_agent_switch']
+    return {'last_agent_switch': last_switch.isoformat() if last_switch else ''}
+
+def stream_response(chunks: Iterator[str]) -> str:
+    """Render streamed response chunks, showing a spinner only until the first one arrives.
+
+    Chunks are unescaped as display_content_with_formatting does for stored messages;
+    the raw text is returned so history renders it the same way.
+    """
+    with st.spinner("Thinking..."):
+        first_chunk = next(chunks, None)
+    
+    raw_chunks = []
+    if first_chunk is not None:
+        def collect():
+            for chunk in itertools.chain([first_chunk], chunks):
+                raw_chunks.append(chunk)
+                yield chunk
+        st.write_stream(unescape_stream(collect()))
+    
+    response = "".join(raw_chunks)
+    if not response or response.isspace():
+        st.info("No content returned")
+    return response
+
 def display_chat_section():
     """Display intelligent conversational chat interface with agent"""
     # Main chat interface
@@ -534,24 +638,28 @@ def display_chat_section():
     
     # Debug information (collapsible)
     with st.expander("🔧 Debug: Conversation Context", expanded=False):
-        st.write("**Session Info:**")
-        st.write(f"- Session ID: {st.session_state.session_id}")
-        st.write(f"- Current Agent: {st.session_state.selected_agent['agentName']}")
-        st.write(f"- Agent ID: {st.session_state.selected_agent['agentId']}")
-        st.write(f"- Alias ID: {st.session_state.chat_alias_id}")
-        
-        st.write("**Conversation Context:**")
-        st.write(f"- Message Count: {st.session_state.conversation_context['message_count']}")
-        st.write(f"- Session Start: {st.session_state.conversation_context['session_start_time'].strftime('%H:%M:%S')}")
-        if st.session_state.conversation_context['last_agent_switch']:
-            st.write(f"- Last Agent Switch: {st.session_state.conversation_context['last_agent_switch'].strftime('%H:%M:%S')}")
-        
-        if st.session_state.messages:
-            st.write("**Recent Messages:**")
-            for i, msg in enumerate(st.session_state.messages[-5:]):  # Show last 5 messages
-                role_icon = "👤" if msg["role"] == "user" else "🤖" if msg["role"] == "assistant" else "⚙️"
-                content_preview = msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
-                st.write(f"{role_icon} {msg['role']}: {content_preview}")
+        context = st.session_state.conversation_context
+        recent_messages = [
+            {
+                "role": msg["role"],
+                "content": msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
+            }
+            for msg in st.session_state.messages[-5:]  # Show last 5 messages
+        ]
+        st.json({
+            "session": {
+                "session_id": st.session_state.session_id,
+                "current_agent": st.session_state.selected_agent['agentName'],
+                "agent_id": st.session_state.selected_agent['agentId'],
+                "alias_id": st.session_state.chat_alias_id
+            },
+            "conversation_context": {
+                "message_count": context['message_count'],
+                "session_start": context['session_start_time'].strftime('%H:%M:%S'),
+                "last_agent_switch": context['last_agent_switch'].strftime('%H:%M:%S') if context['last_agent_switch'] else None
+            },
+            "recent_messages": recent_messages
+        }, expanded=False)
     
     # Display chat messages
     for message in st.session_state.messages:
@@ -561,15 +669,31 @@ def display_chat_section():
 
     # Generate initial response (if it's the first message)
     if not st.session_state.messages:
+        # The greeting for an agent/alias is near-identical every time, so reuse it across
+        # new sessions; the agent then hears it via history replay on the first real turn
+        greeting_cache = st.session_state.setdefault('_greeting_cache', {})
+        greeting_key = (st.session_state.selected_agent['agentId'], st.session_state.chat_alias_id)
+        response = greeting_cache.get(greeting_key)
         with st.chat_message("assistant"):
-            response = st.session_state.chatbot.invoke_agent(
-                agent_id=st.session_state.selected_agent['agentId'],
-                agent_alias_id=st.session_state.chat_alias_id,
-                user_input='Hello',
-                session_id=st.session_state.session_id,
-                conversation_history=st.session_state.messages
-            )
-            display_content_with_formatting(response)
+            if response is not None:
+                display_content_with_formatting(response)
+            else:
+                try:
+                    response = stream_response(st.session_state.chatbot.invoke_agent_stream(
+                        agent_id=st.session_state.selected_agent['agentId'],
+                        agent_alias_id=st.session_state.chat_alias_id,
+                        user_input='Hello',
+                        session_id=st.session_state.session_id,
+                        conversation_history=agent_history(st.session_state.selected_agent['agentId'], st.session_state.messages),
+                        session_attributes=agent_session_attributes()
+                    ))
+                    # Reached only when the invocation did not raise AgentInvocationError
+                    mark_agent_primed(st.session_state.selected_agent['agentId'])
+                    if response and not response.isspace():
+                        greeting_cache[greeting_key] = response
+                except _chatbot_module().AgentInvocationError as e:
+                    response = f"{_chatbot_module().AGENT_ERROR_PREFIX}: {str(e)}"
+                    st.error(response)
         st.session_state.messages.append({"role": "assistant", "content": response})
         # Update conversation context
         st.session_state.conversation_context['message_count'] += 1
@@ -584,30 +708,33 @@ def display_chat_section():
         
         # Generate assistant response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    # Invoke the agent with conversation history
-                    response = st.session_state.chatbot.invoke_agent(
-                        agent_id=st.session_state.selected_agent['agentId'],
-                        agent_alias_id=st.session_state.chat_alias_id,
-                        user_input=prompt,
-                        session_id=st.session_state.session_id,
-                        conversation_history=st.session_state.messages
-                    )
+            try:
+                # Invoke the agent, rendering chunks as they arrive. Prior turns (excluding the
+                # prompt just appended) are only replayed to an agent new to this session.
+                response = stream_response(st.session_state.chatbot.invoke_agent_stream(
+                    agent_id=st.session_state.selected_agent['agentId'],
+                    agent_alias_id=st.session_state.chat_alias_id,
+                    user_input=prompt,
+                    session_id=st.session_state.session_id,
+                    conversation_history=agent_history(st.session_state.selected_agent['agentId'], st.session_state.messages[:-1]),
+                    session_attributes=agent_session_attributes()
+                ))
+                mark_agent_primed(st.session_state.selected_agent['agentId'])
+                
+                # stream_response has already reported an empty reply
+                if response:
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    # Update conversation context
+                    st.session_state.conversation_context['message_count'] += 1
                     
-                    if response:
-                        # st.markdown(response)
-                        display_content_with_formatting(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                        # Update conversation context
-                        st.session_state.conversation_context['message_count'] += 1
-                    else:
-                        st.error("No response received from agent")
-                        
-                except Exception as e:
-                    error_msg = f"Sorry, I encountered an error: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            except Exception as e:
+                error_msg = f"{_chatbot_module().AGENT_ERROR_PREFIX}: {str(e)}"
+                st.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+
+def shift_file_page(page_key: str, delta: int):
+    """Move a File Management folder to the previous/next page (button callback)"""
+    st.session_state[page_key] = st.session_state.get(page_key, 0) + delta
 
 def display_knowledge_base_section():
     """Display knowledge base management interface"""
@@ -639,9 +766,10 @@ def display_knowledge_base_section():
             # Reset the file uploader after successful upload
             st.session_state.uploader_key += 1
 
-            # Sync the knowledge base
-            with st.spinner("Syncing knowledge base..."):
-                st.session_state.chatbot.sync_knowledge_base()
+            # Sync the knowledge base, unless nothing was actually uploaded
+            if any(result['status'] == 'success' for result in results.values()):
+                with st.spinner("Syncing knowledge base..."):
+                    st.session_state.chatbot.sync_knowledge_base()
     
     st.divider()
     
@@ -649,31 +777,52 @@ def display_knowledge_base_section():
     st.subheader("📄 File Management")
     
     folder_prefix = "upload_files"
-    files = st.session_state.chatbot.list_s3_files(folder_prefix)
+    files = st.session_state.chatbot.list_s3_files_all(folder_prefix)
     
     if files:
         # Group files by folder for better organization
-        files_by_folder = {}
+        files_by_folder = defaultdict(list)
         for file in files:
-            folder = file['folder'] or 'root'
-            if folder not in files_by_folder:
-                files_by_folder[folder] = []
-            files_by_folder[folder].append(file)
+            files_by_folder[file['folder'] or 'root'].append(file)
         
         # Display files grouped by folder
+        selected_keys = []
         for folder, folder_files in files_by_folder.items():
             with st.expander(f"📁 {folder} ({len(folder_files)} files)", expanded=False):
-                for file in folder_files:
+                # Only one page of rows is rendered, so large folders don't build thousands of widgets per rerun
+                page_key = f"page_{folder}"
+                page_count = (len(folder_files) - 1) // FILES_PAGE_SIZE + 1
+                # Clamp and store, so ◀/▶ step from the page shown after deletions shrink the folder
+                page = min(max(st.session_state.get(page_key, 0), 0), page_count - 1)
+                st.session_state[page_key] = page
+                if page_count > 1:
+                    nav_prev, nav_label, nav_next = st.columns([1, 3, 1])
+                    nav_prev.button("◀", key=f"prev_{folder}", disabled=page == 0,
+                                    on_click=shift_file_page, args=(page_key, -1))
+                    nav_label.caption(f"Page {page + 1} of {page_count}")
+                    nav_next.button("▶", key=f"next_{folder}", disabled=page == page_count - 1,
+                                    on_click=shift_file_page, args=(page_key, 1))
+                
+                for file in folder_files[page * FILES_PAGE_SIZE:(page + 1) * FILES_PAGE_SIZE]:
                     col1, col2 = st.columns([3, 1])
                     with col1:
-                        st.write(f"📄 {file['name'].split('/')[-1]}")  # Show only filename
+                        st.write(f"📄 {file['display_name']}")  # Show only filename
                         st.caption(f"Size: {format_file_size(file['size'])} | Modified: {file['modified'].strftime('%Y-%m-%d %H:%M')}")
                     with col2:
-                        if st.button(f"🗑️", key=f"del_{file['name']}"):
-                            if st.session_state.chatbot.delete_file_from_s3(file['name']):
-                                # Sync the knowledge base
-                                st.session_state.chatbot.sync_knowledge_base()
-                                st.rerun()
+                        if st.checkbox("Select", key=f"sel_{file['name']}", label_visibility="collapsed"):
+                            selected_keys.append(file['name'])
+        
+        # One DeleteObjects request and one sync for the whole selection
+        if st.button(f"🗑️ Delete selected ({len(selected_keys)})", disabled=not selected_keys):
+            with st.spinner("Deleting files..."):
+                delete_results = st.session_state.chatbot.delete_files_from_s3(selected_keys)
+            failed = [key for key, ok in delete_results.items() if not ok]
+            if failed:
+                st.error(f"Failed to delete {len(failed)} file(s): {', '.join(failed)}")
+            if len(failed) < len(delete_results):
+                # Sync the knowledge base
+                st.session_state.chatbot.sync_knowledge_base()
+                st.rerun()
     else:
         st.write("No files found")
     
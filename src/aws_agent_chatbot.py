@@ -1,38 +1,155 @@
 import streamlit as st
 import boto3
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from botocore.exceptions import ClientError
 import mimetypes
 import os
-from src.utilities.utils import sanitize_filename
+import threading
+import time
+import uuid
+from src.utilities.utils import sanitize_filename, extract_text_preview, with_script_run_ctx
+
+# Concurrency settings for S3 uploads
+UPLOAD_MAX_WORKERS = 16  # files uploaded in parallel
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB parts
+MULTIPART_MAX_CONCURRENCY = 10  # parts in flight per file
+DIRECT_MULTIPART_THRESHOLD = 64 * 1024 * 1024  # files above this skip TransferManager buffering
+DIRECT_MULTIPART_PART_SIZE = 16 * 1024 * 1024  # part size for direct multipart uploads
+S3_DELETE_BATCH_SIZE = 1000  # DeleteObjects limit per request
+PROGRESS_UPDATE_INTERVAL = 0.1  # seconds between upload progress redraws
+
+# Load the system MIME maps once at import instead of on the first upload
+mimetypes.init()
+_MIME_CACHE: Dict[str, str] = {}
+
+
+def _content_type(filename: str) -> str:
+    """Guess a file's content type, memoized per extension"""
+    ext = os.path.splitext(filename)[1].lower()
+    content_type = _MIME_CACHE.get(ext)
+    if content_type is None:
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        _MIME_CACHE[ext] = content_type
+    return content_type
+
+
+# Start of the message shown and stored in place of an agent response when invocation fails
+AGENT_ERROR_PREFIX = "Sorry, I encountered an error"
+
+
+class AgentInvocationError(Exception):
+    """Raised by invoke_agent_stream when the agent call fails, possibly after part of the reply was yielded"""
+
+# Agent metadata changes rarely, so control-plane lookups are cached for a few minutes
+AGENT_CACHE_TTL = 300
+
+# S3 listings are cached briefly and cleared whenever this app uploads, deletes or syncs
+S3_LIST_CACHE_TTL = 30
+
+
+# The boto3 client is passed with a leading underscore so Streamlit does not hash it;
+# region and access key id keep cache entries separate per account/region.
+@st.cache_data(ttl=AGENT_CACHE_TTL, show_spinner=False)
+def _list_agents(_client, region_name: str, access_key_id: Optional[str]) -> List[Dict[str, Any]]:
+    """List agents (cached)"""
+    response = _client.list_agents()
+    return response.get('agentSummaries', [])
+
+
+@st.cache_data(ttl=AGENT_CACHE_TTL, show_spinner=False)
+def _get_agent_details(_client, region_name: str, access_key_id: Optional[str], agent_id: str) -> Dict[str, Any]:
+    """Get agent details (cached)"""
+    response = _client.get_agent(agentId=agent_id)
+    return response.get('agent', {})
+
+
+@st.cache_data(ttl=AGENT_CACHE_TTL, show_spinner=False)
+def _list_agent_aliases(_client, region_name: str, access_key_id: Optional[str], agent_id: str) -> List[Dict[str, Any]]:
+    """List agent aliases (cached)"""
+    response = _client.list_agent_aliases(agentId=agent_id)
+    return response.get('agentAliasSummaries', [])
+
+
+@st.cache_data(ttl=AGENT_CACHE_TTL, max_entries=128, show_spinner=False)
+def _kb_retrieve(_client, region_name: str, access_key_id: Optional[str], knowledge_base_id: str,
+                 query: str, max_results: int) -> List[Dict]:
+    """Retrieve from a knowledge base (cached; cleared whenever a sync is started)"""
+    response = _client.retrieve(
+        knowledgeBaseId=knowledge_base_id,
+        retrievalQuery={
+            'text': query
+        },
+        retrievalConfiguration={
+            'vectorSearchConfiguration': {
+                'numberOfResults': max_results
+            }
+        }
+    )
+    return response.get('retrievalResults', [])
+
+
+@st.cache_data(ttl=S3_LIST_CACHE_TTL, show_spinner=False)
+def _list_s3_objects(_chatbot, region_name: str, access_key_id: Optional[str], bucket: str,
+                     prefix: str) -> List[Dict]:
+    """List files under a prefix (cached; cleared on upload, delete and sync)"""
+    return list(_chatbot.list_s3_files(prefix))
 
 
 class AWSAgentChatbot:
     def __init__(self, region_name: str = 'us-west-2', aws_access_key_id: str = None, 
-                 aws_secret_access_key: str = None):
+                 aws_secret_access_key: str = None, max_retries: int = 10,
+                 performance_config: str = "optimized"):
         """Initialize AWS clients and configuration"""
-        self.setup_aws_clients(region_name, aws_access_key_id, aws_secret_access_key)
+        self._data_source_id = None
+        # Stream the agent's final response token by token; turned off if the agent's role lacks
+        # bedrock:InvokeModelWithResponseStream, so replies then arrive as a single chunk
+        self._stream_final_response = True
+        # Bedrock inference latency profile: "optimized" or "standard"
+        self.performance_config = performance_config
+        self.setup_aws_clients(region_name, aws_access_key_id, aws_secret_access_key, max_retries)
         self.setup_configuration()
     
     def setup_aws_clients(self, region_name: str = 'us-west-2', aws_access_key_id: str = None, 
-                          aws_secret_access_key: str = None):
+                          aws_secret_access_key: str = None, max_retries: int = 10):
         """Initialize AWS service clients"""
         try:
             # Configure boto3 with longer timeouts for slow agents
             from botocore.config import Config
+            from boto3.s3.transfer import TransferConfig
+            
+            # Multipart transfer settings shared by every upload
+            self._transfer_cfg = TransferConfig(
+                multipart_threshold=MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=MULTIPART_CHUNK_SIZE,
+                max_concurrency=MULTIPART_MAX_CONCURRENCY,
+                use_threads=True
+            )
             
             config = Config(
                 region_name=region_name,
                 retries={
-                    'max_attempts': 10,
+                    'max_attempts': max_retries,
                     'mode': 'adaptive'
                 },
                 read_timeout=300,  # 5 minutes read timeout
                 connect_timeout=60,  # 1 minute connect timeout
-                max_pool_connections=50
+                max_pool_connections=50,
+                # Keep pooled connections warm between chat turns
+                tcp_keepalive=True,
+                # Compress large request bodies on operations that support it
+                disable_request_compression=False,
+                request_min_compression_size_bytes=1024
             )
             
+            # S3 needs a larger pool so keep-alive sockets survive parallel uploads.
+            # Invariant: max_pool_connections >= upload threads * multipart concurrency
+            s3_config = config.merge(Config(
+                max_pool_connections=max(50, UPLOAD_MAX_WORKERS * MULTIPART_MAX_CONCURRENCY + 10)
+            ))
+            
             # Store credentials for later use
             self.aws_access_key_id = aws_access_key_id
             self.aws_secret_access_key = aws_secret_access_key
@@ -44,7 +161,7 @@ class AWSAgentChatbot:
                     's3',
                     aws_access_key_id=aws_access_key_id,
                     aws_secret_access_key=aws_secret_access_key,
-                    region_name=region_name
+                    config=s3_config
                 )
                 self.bedrock_agent_client = boto3.client(
                     'bedrock-agent',
@@ -58,11 +175,18 @@ class AWSAgentChatbot:
                     aws_secret_access_key=aws_secret_access_key,
                     config=config
                 )
+                self.sts_client = boto3.client(
+                    'sts',
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    config=config
+                )
             else:
                 # Use default credentials (environment variables, IAM roles, etc.)
-                self.s3_client = boto3.client('s3', region_name=region_name)
+                self.s3_client = boto3.client('s3', config=s3_config)
                 self.bedrock_agent_client = boto3.client('bedrock-agent', config=config)
                 self.bedrock_agent_runtime_client = boto3.client('bedrock-agent-runtime', config=config)
+                self.sts_client = boto3.client('sts', config=config)
             
             self.region_name = region_name
             
@@ -73,12 +197,21 @@ class AWSAgentChatbot:
     def setup_configuration(self):
         """Setup configuration from environment variables or Streamlit secrets"""
         try:
+            # Read Streamlit secrets once; a missing secrets file just means env-only config
+            try:
+                secrets = dict(st.secrets)
+            except Exception:
+                secrets = {}
+            
             # Try to get from Streamlit secrets first, then environment variables
-            self.s3_bucket = st.secrets.get("S3_BUCKET", os.getenv("S3_BUCKET", ""))
-            self.s3_bucket_folder = st.secrets.get("S3_BUCKET_FOLDER", os.getenv("S3_BUCKET_FOLDER", ""))
-            self.knowledge_base_id = st.secrets.get("KNOWLEDGE_BASE_ID", os.getenv("KNOWLEDGE_BASE_ID", ""))
-            self.agent_id = st.secrets.get("AGENT_ID", os.getenv("AGENT_ID", ""))
-            self.agent_alias_id = st.secrets.get("AGENT_ALIAS_ID", os.getenv("AGENT_ALIAS_ID", "TSTALIASID"))
+            self.s3_bucket = secrets.get("S3_BUCKET", os.getenv("S3_BUCKET", ""))
+            self.s3_bucket_folder = secrets.get("S3_BUCKET_FOLDER", os.getenv("S3_BUCKET_FOLDER", ""))
+            self.knowledge_base_id = secrets.get("KNOWLEDGE_BASE_ID", os.getenv("KNOWLEDGE_BASE_ID", ""))
+            self.agent_id = secrets.get("AGENT_ID", os.getenv("AGENT_ID", ""))
+            self.agent_alias_id = secrets.get("AGENT_ALIAS_ID", os.getenv("AGENT_ALIAS_ID", "TSTALIASID"))
+            
+            # Static part of the metadata attached to every upload
+            self._base_meta = {'folder': self.s3_bucket_folder}
             
             if not all([self.s3_bucket, self.knowledge_base_id, self.agent_id]):
                 st.warning("Please configure your AWS resources in the sidebar")
@@ -89,23 +222,13 @@ class AWSAgentChatbot:
     def test_credentials(self) -> Dict[str, Any]:
         """Test AWS credentials and return connection status"""
         try:
-            # Test basic AWS access by calling STS with the same credentials
-            if self.aws_access_key_id and self.aws_secret_access_key:
-                # Use the same credentials as other clients
-                sts_client = boto3.client(
-                    'sts',
-                    aws_access_key_id=self.aws_access_key_id,
-                    aws_secret_access_key=self.aws_secret_access_key,
-                    region_name=self.region_name
-                )
-            else:
-                # Use default credentials
-                sts_client = boto3.client('sts', region_name=self.region_name)
-            
-            identity = sts_client.get_caller_identity()
-            
-            # Test Bedrock Agent access
-            agents = self.list_agents()
+            # Test basic AWS access (STS) and Bedrock Agent access concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                identity_future = executor.submit(self.sts_client.get_caller_identity)
+                # list_agents reports errors with st.error, so it needs the script run context
+                agents_future = executor.submit(with_script_run_ctx(self.list_agents))
+                identity = identity_future.result()
+                agents = agents_future.result()
             
             return {
                 'status': 'success',
@@ -136,12 +259,16 @@ class AWSAgentChatbot:
                 'credential_method': 'manual' if self.aws_access_key_id else 'default'
             }
     
+    def clear_agent_cache(self):
+        """Drop cached agent, alias and agent detail lookups"""
+        _list_agents.clear()
+        _get_agent_details.clear()
+        _list_agent_aliases.clear()
+    
     def list_agents(self) -> List[Dict[str, Any]]:
         """List all available agents"""
         try:
-            response = self.bedrock_agent_client.list_agents()
-            agents = response.get('agentSummaries', [])
-            return agents
+            return _list_agents(self.bedrock_agent_client, self.region_name, self.aws_access_key_id)
         except Exception as e:
             st.error(f"Error listing agents: {str(e)}")
             return []
@@ -149,8 +276,7 @@ class AWSAgentChatbot:
     def get_agent_details(self, agent_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific agent"""
         try:
-            response = self.bedrock_agent_client.get_agent(agentId=agent_id)
-            return response.get('agent', {})
+            return _get_agent_details(self.bedrock_agent_client, self.region_name, self.aws_access_key_id, agent_id)
         except Exception as e:
             st.error(f"Error getting agent details: {str(e)}")
             return {}
@@ -158,66 +284,135 @@ class AWSAgentChatbot:
     def list_agent_aliases(self, agent_id: str) -> List[Dict[str, Any]]:
         """List aliases for a specific agent"""
         try:
-            response = self.bedrock_agent_client.list_agent_aliases(agentId=agent_id)
-            return response.get('agentAliasSummaries', [])
+            return _list_agent_aliases(self.bedrock_agent_client, self.region_name, self.aws_access_key_id, agent_id)
         except Exception as e:
             st.error(f"Error listing agent aliases: {str(e)}")
             return []
 
+    def _upload_extra_args(self, filename: str, size: Optional[int], timestamp: str) -> Dict[str, Any]:
+        """Build the ContentType/Metadata ExtraArgs for an upload"""
+        metadata = self._base_meta.copy()
+        metadata['original_filename'] = filename
+        metadata['upload_timestamp'] = timestamp
+        metadata['file_size'] = str(size) if size is not None else 'unknown'
+        return {'ContentType': _content_type(filename), 'Metadata': metadata}
+
+    def _multipart_upload(self, file_obj, key: str, size: int, extra_args: Dict[str, Any]):
+        """Upload a large seekable file with parallel UploadPart calls, reading one part at a time"""
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=self.s3_bucket, Key=key, **extra_args
+        )['UploadId']
+        read_lock = threading.Lock()
+        
+        def upload_part(part_number: int) -> Dict[str, Any]:
+            # Only part_size bytes per in-flight part are held in memory
+            with read_lock:
+                file_obj.seek((part_number - 1) * DIRECT_MULTIPART_PART_SIZE)
+                data = file_obj.read(DIRECT_MULTIPART_PART_SIZE)
+            response = self.s3_client.upload_part(
+                Bucket=self.s3_bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data
+            )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        
+        try:
+            part_count = -(-size // DIRECT_MULTIPART_PART_SIZE)
+            with ThreadPoolExecutor(max_workers=MULTIPART_MAX_CONCURRENCY) as executor:
+                parts = list(executor.map(upload_part, range(1, part_count + 1)))
+            
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.s3_bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            self.s3_client.abort_multipart_upload(Bucket=self.s3_bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def _upload_one(self, file_obj, timestamp: str) -> Tuple[str, Dict]:
+        """Upload a single file to S3 and return its name with the upload result"""
+        try:
+            # Generate unique filename with folder structure
+            sanitized_filename = sanitize_filename(file_obj.name)
+            unique_filename = f"{self.s3_bucket_folder}/{timestamp}_{sanitized_filename}"
+            
+            size = getattr(file_obj, 'size', None)
+            extra_args = self._upload_extra_args(file_obj.name, size, timestamp)
+            
+            # Upload file; large files send parts straight from the file object
+            file_obj.seek(0)
+            if size is not None and size > DIRECT_MULTIPART_THRESHOLD:
+                self._multipart_upload(file_obj, unique_filename, size, extra_args)
+            else:
+                self.s3_client.upload_fileobj(
+                    file_obj, 
+                    self.s3_bucket, 
+                    unique_filename,
+                    Config=self._transfer_cfg,
+                    ExtraArgs=extra_args
+                )
+            
+            return file_obj.name, {
+                'status': 'success',
+                'uploaded_name': unique_filename,
+                'message': f"Uploaded successfully as {unique_filename}"
+            }
+            
+        except ClientError as e:
+            return file_obj.name, {
+                'status': 'error',
+                'uploaded_name': None,
+                'message': f"Failed to upload: {str(e)}"
+            }
+        except Exception as e:
+            return file_obj.name, {
+                'status': 'error',
+                'uploaded_name': None,
+                'message': f"Unexpected error: {str(e)}"
+            }
+
     def upload_multiple_files_to_s3(self, files_list: List) -> Dict[str, Dict]:
         """Upload multiple files to S3 bucket in specified folder"""
         results = {}
+        total_files = len(files_list)
+        if total_files == 0:
+            return results
+        
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        total_files = len(files_list)
+        # One timestamp per batch keeps keys deterministic; the sanitized name keeps them unique
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        for i, file_obj in enumerate(files_list):
-            try:
-                # Update progress
-                progress = (i + 1) / total_files
-                progress_bar.progress(progress)
-                status_text.text(f"Uploading {file_obj.name} ({i + 1}/{total_files})")
-                
-                # Generate unique filename with folder structure
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                sanitized_filename = sanitize_filename(file_obj.name)
-                unique_filename = f"{self.s3_bucket_folder}/{timestamp}_{sanitized_filename}"
-                
-                # Upload file
-                self.s3_client.upload_fileobj(
-                    file_obj, 
-                    self.s3_bucket, 
-                    unique_filename,
-                    ExtraArgs={
-                        'ContentType': mimetypes.guess_type(file_obj.name)[0] or 'application/octet-stream',
-                        'Metadata': {
-                            'original_filename': file_obj.name,
-                            'upload_timestamp': timestamp,
-                            'folder': self.s3_bucket_folder,
-                            'file_size': str(file_obj.size) if hasattr(file_obj, 'size') else 'unknown'
-                        }
+        # Uploads are network bound, so run them concurrently on the shared (thread-safe) client.
+        # Streamlit elements are only updated from this thread.
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_MAX_WORKERS, total_files)) as executor:
+            futures = {executor.submit(self._upload_one, file_obj, timestamp): file_obj for file_obj in files_list}
+            
+            # as_completed (not executor.map) so one slow file never holds back the others' progress
+            last_update = 0.0
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    name, result = future.result()
+                except Exception as e:
+                    name = futures[future].name
+                    result = {
+                        'status': 'error',
+                        'uploaded_name': None,
+                        'message': f"Unexpected error: {str(e)}"
                     }
-                )
+                results[name] = result
                 
-                results[file_obj.name] = {
-                    'status': 'success',
-                    'uploaded_name': unique_filename,
-                    'message': f"Uploaded successfully as {unique_filename}"
-                }
-                
-            except ClientError as e:
-                results[file_obj.name] = {
-                    'status': 'error',
-                    'uploaded_name': None,
-                    'message': f"Failed to upload: {str(e)}"
-                }
-            except Exception as e:
-                results[file_obj.name] = {
-                    'status': 'error',
-                    'uploaded_name': None,
-                    'message': f"Unexpected error: {str(e)}"
-                }
+                # Update progress at most ~10 times per second, always on the last file
+                now = time.monotonic()
+                if now - last_update > PROGRESS_UPDATE_INTERVAL or done == total_files:
+                    last_update = now
+                    progress_bar.progress(done / total_files)
+                    status_text.text(f"Uploaded {name} ({done}/{total_files})")
         
         # Clear progress indicators
         progress_bar.empty()
@@ -228,6 +423,7 @@ class AWSAgentChatbot:
         failed_uploads = total_files - successful_uploads
         
         if successful_uploads > 0:
+            self.clear_s3_cache()
             st.success(f"✅ Successfully uploaded {successful_uploads} file(s)")
         if failed_uploads > 0:
             st.error(f"❌ Failed to upload {failed_uploads} file(s)")
@@ -244,6 +440,9 @@ class AWSAgentChatbot:
             
             job_id = response['ingestionJob']['ingestionJobId']
             st.info(f"🔄 Knowledge base sync started. Job ID: {job_id}")
+            # Retrievals and listings cached before this ingestion may be stale
+            self.clear_kb_cache()
+            self.clear_s3_cache()
 
             return job_id
             
@@ -251,15 +450,24 @@ class AWSAgentChatbot:
             st.error(f"❌ Failed to sync knowledge base: {str(e)}")
             return None
     
+    def clear_kb_cache(self):
+        """Drop cached knowledge base retrievals"""
+        _kb_retrieve.clear()
+    
     def get_data_source_id(self):
         """Get the first data source ID for the knowledge base"""
+        # The data source does not change for a knowledge base, so look it up once
+        if self._data_source_id:
+            return self._data_source_id
+        
         try:
             response = self.bedrock_agent_client.list_data_sources(
                 knowledgeBaseId=self.knowledge_base_id
             )
             
             if response['dataSourceSummaries']:
-                return response['dataSourceSummaries'][0]['dataSourceId']
+                self._data_source_id = response['dataSourceSummaries'][0]['dataSourceId']
+                return self._data_source_id
             else:
                 st.error("No data sources found for knowledge base")
                 return None
@@ -270,134 +478,236 @@ class AWSAgentChatbot:
     
     def query_knowledge_base(self, query: str, max_results: int = 5) -> List[Dict]:
         """Query the knowledge base directly"""
+        if not query.strip():
+            return []
+        
         try:
-            response = self.bedrock_agent_runtime_client.retrieve(
-                knowledgeBaseId=self.knowledge_base_id,
-                retrievalQuery={
-                    'text': query
-                },
-                retrievalConfiguration={
-                    'vectorSearchConfiguration': {
-                        'numberOfResults': max_results
-                    }
-                }
+            return _kb_retrieve(
+                self.bedrock_agent_runtime_client, self.region_name, self.aws_access_key_id,
+                self.knowledge_base_id, query, max_results
             )
             
-            return response.get('retrievalResults', [])
-            
         except ClientError as e:
             st.error(f"Failed to query knowledge base: {str(e)}")
             return []
     
-    def invoke_agent(self, agent_id: str, agent_alias_id: str, user_input: str, session_id: str, conversation_history: List[Dict] = None) -> str:
-        """Invoke the Bedrock agent with conversation history"""
+    def _model_configurations(self) -> Dict[str, Any]:
+        """Model settings sent with every agent invocation"""
+        return {'performanceConfig': {'latency': self.performance_config}}
+    
+    def _invoke_agent_request(self, agent_id: str, agent_alias_id: str, user_input: str, session_id: str,
+                              conversation_history: List[Dict] = None,
+                              session_attributes: Dict[str, str] = None,
+                              stream_final_response: bool = False) -> Dict[str, Any]:
+        """Build the InvokeAgent request parameters"""
+        if conversation_history:
+            # Format conversation history for the agent
+            context = self._build_conversation_context(conversation_history, user_input)
+        else:
+            context = user_input
+        
+        request = {
+            'agentId': agent_id,
+            'agentAliasId': agent_alias_id,
+            'sessionId': session_id,
+            'inputText': context,
+            'bedrockModelConfigurations': self._model_configurations()
+        }
+        if session_attributes:
+            request['sessionState'] = {'sessionAttributes': session_attributes}
+        if stream_final_response:
+            request['streamingConfigurations'] = {'streamFinalResponse': True}
+        return request
+    
+    def invoke_agent_stream(self, agent_id: str, agent_alias_id: str, user_input: str, session_id: str,
+                            conversation_history: List[Dict] = None,
+                            session_attributes: Dict[str, str] = None) -> Iterator[str]:
+        """Invoke the Bedrock agent, yielding response chunks as they arrive.
+
+        Raises AgentInvocationError if the call fails, including partway through the stream.
+        """
+        stream_final_response = self._stream_final_response
+        received = False
         try:
-            # Build conversation context
-            if conversation_history:
-                # Format conversation history for the agent
-                context = self._build_conversation_context(conversation_history, user_input)
-            else:
-                context = user_input
-                
             response = self.bedrock_agent_runtime_client.invoke_agent(
-                agentId=agent_id,
-                agentAliasId=agent_alias_id,
-                sessionId=session_id,
-                inputText=context
+                **self._invoke_agent_request(agent_id, agent_alias_id, user_input, session_id,
+                                             conversation_history, session_attributes, stream_final_response)
             )
             
             # Process the response stream
-            full_response = ""
             for event in response['completion']:
                 if 'chunk' in event:
                     chunk = event['chunk']
                     if 'bytes' in chunk:
-                        full_response += chunk['bytes'].decode('utf-8')
-            
-            return full_response
+                        received = True
+                        yield chunk['bytes'].decode('utf-8')
             
         except ClientError as e:
-            st.error(f"Failed to invoke agent: {str(e)}")
-            return f"Sorry, I encountered an error: {str(e)}"
+            # Streaming needs bedrock:InvokeModelWithResponseStream on the agent's role. Without it, retry
+            # this turn (nothing was received yet) and later ones with the final response in one chunk.
+            if stream_final_response and not received and \
+                    e.response.get('Error', {}).get('Code', '').lower() == 'accessdeniedexception':
+                self._stream_final_response = False
+                yield from self.invoke_agent_stream(agent_id, agent_alias_id, user_input, session_id,
+                                                    conversation_history, session_attributes)
+                return
+            raise AgentInvocationError(str(e)) from e
+    
+    def warm_up_agent(self, agent_id: str, agent_alias_id: str) -> bool:
+        """Invoke the agent once in a throwaway session to absorb cold start; safe to run off the script thread"""
+        try:
+            response = self.bedrock_agent_runtime_client.invoke_agent(
+                **self._invoke_agent_request(agent_id, agent_alias_id, "Hello", str(uuid.uuid4()))
+            )
+            # Drain the stream so the invocation runs to completion
+            for _ in response['completion']:
+                pass
+            return True
+        except Exception:
+            return False
+    
+    def invoke_agent(self, agent_id: str, agent_alias_id: str, user_input: str, session_id: str,
+                     conversation_history: List[Dict] = None,
+                     session_attributes: Dict[str, str] = None) -> str:
+        """Invoke the Bedrock agent"""
+        return "".join(self.invoke_agent_stream(agent_id, agent_alias_id, user_input, session_id,
+                                                conversation_history, session_attributes))
     
     def _build_conversation_context(self, conversation_history: List[Dict], current_input: str) -> str:
         """Build conversation context from history"""
-        context_parts = []
+        if not conversation_history:
+            return current_input
         
-        # Add recent conversation history (last 10 exchanges to avoid token limits)
-        recent_history = conversation_history[-10:]  # Last 10 messages
+        parts = []
         
-        for msg in recent_history:
+        # Add recent conversation history (last 10 messages to avoid token limits)
+        for msg in conversation_history[-10:]:
+            role = msg.get("role")
             # Skip system messages and context messages as they're internal
-            if msg.get("role") == "system" or msg.get("is_context", False):
+            if role == "system" or msg.get("is_context"):
                 continue
-                
-            if msg["role"] == "user":
-                context_parts.append(f"User: {msg['content']}")
-            elif msg["role"] == "assistant":
-                context_parts.append(f"Assistant: {msg['content']}")
-        
-        # Add current input
-        context_parts.append(f"User: {current_input}")
+            
+            if role == "user":
+                parts.append("User: ")
+            elif role == "assistant":
+                parts.append("Assistant: ")
+            else:
+                continue
+            parts.append(msg["content"])
+            parts.append("\n\n")
         
-        # If we have context, add a separator for clarity
-        if len(context_parts) > 1:
-            return "\n\n".join(context_parts)
-        else:
+        # Without usable history the input is sent as-is
+        if not parts:
             return current_input
+        
+        # Add current input
+        parts.append("User: ")
+        parts.append(current_input)
+        return "".join(parts)
     
     def get_conversation_summary(self, conversation_history: List[Dict]) -> str:
         """Get a summary of the conversation for context"""
         if not conversation_history:
             return "No previous conversation."
         
-        # Count messages by type
-        user_messages = [msg for msg in conversation_history if msg.get("role") == "user" and not msg.get("is_context", False)]
-        assistant_messages = [msg for msg in conversation_history if msg.get("role") == "assistant"]
+        # Count messages by type in a single pass, keeping the last 3 user messages
+        user_count = 0
+        assistant_count = 0
+        recent_user_messages = deque(maxlen=3)
+        for msg in conversation_history:
+            role = msg.get("role")
+            if role == "user" and not msg.get("is_context", False):
+                user_count += 1
+                recent_user_messages.append(msg['content'])
+            elif role == "assistant":
+                assistant_count += 1
         
-        summary = f"Conversation has {len(user_messages)} user messages and {len(assistant_messages)} assistant responses."
+        summary = f"Conversation has {user_count} user messages and {assistant_count} assistant responses."
         
         # Add recent topics if available
-        if user_messages:
-            recent_topics = [msg['content'][:50] + "..." if len(msg['content']) > 50 else msg['content'] 
-                           for msg in user_messages[-3:]]  # Last 3 user messages
+        if recent_user_messages:
+            recent_topics = [extract_text_preview(content, 50) for content in recent_user_messages]
             summary += f" Recent topics: {', '.join(recent_topics)}"
         
         return summary
     
-    def list_s3_files(self, folder_prefix: str = "") -> List[Dict]:
-        """List files in S3 bucket with optional folder filtering"""
-        try:
-            params = {'Bucket': self.s3_bucket}
-            if folder_prefix:
-                params['Prefix'] = folder_prefix
-            
-            response = self.s3_client.list_objects_v2(**params)
-            files = []
-            
-            for obj in response.get('Contents', []):
+    def list_s3_files(self, folder_prefix: str = "") -> Iterator[Dict]:
+        """Yield files in S3 bucket with optional folder filtering, one page at a time.
+
+        ClientErrors propagate so that the cached listing never stores a failed result.
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        page_iter = paginator.paginate(
+            Bucket=self.s3_bucket,
+            Prefix=folder_prefix or '',
+            PaginationConfig={'PageSize': 1000}
+        )
+        
+        for page in page_iter:
+            for obj in page.get('Contents', []):
+                key = obj['Key']
                 # Skip folder markers (objects ending with /)
-                if not obj['Key'].endswith('/'):
-                    files.append({
-                        'name': obj['Key'],
-                        'size': obj['Size'],
-                        'modified': obj['LastModified'],
-                        'folder': '/'.join(obj['Key'].split('/')[:-1]) if '/' in obj['Key'] else 'root'
-                    })
-            
-            return files
-            
+                if key.endswith('/'):
+                    continue
+                
+                folder, sep, display_name = key.rpartition('/')
+                yield {
+                    'name': key,
+                    'display_name': display_name,
+                    'size': obj['Size'],
+                    'modified': obj['LastModified'],
+                    'folder': folder if sep else 'root'
+                }
+
+    def list_s3_files_all(self, folder_prefix: str = "") -> List[Dict]:
+        """List all files in S3 bucket with optional folder filtering (cached)"""
+        try:
+            return _list_s3_objects(self, self.region_name, self.aws_access_key_id,
+                                    self.s3_bucket, folder_prefix or '')
         except ClientError as e:
             st.error(f"Failed to list S3 files: {str(e)}")
             return []
 
-    def delete_file_from_s3(self, file_key: str) -> bool:
-        """Delete file from S3 bucket"""
+    def clear_s3_cache(self):
+        """Drop cached S3 listings"""
+        _list_s3_objects.clear()
+
+    def _delete_batch(self, batch: List[str]) -> Dict[str, bool]:
+        """Delete up to 1000 keys with a single DeleteObjects request"""
         try:
-            self.s3_client.delete_object(Bucket=self.s3_bucket, Key=file_key)
-            return True
+            response = self.s3_client.delete_objects(
+                Bucket=self.s3_bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
         except ClientError as e:
-            return False
+            return {key: False for key in batch}
+        
+        # In quiet mode only failed keys are reported back
+        results = {key: True for key in batch}
+        for error in response.get('Errors', []):
+            results[error['Key']] = False
+        return results
+
+    def delete_files_from_s3(self, keys: List[str]) -> Dict[str, bool]:
+        """Delete files from S3 bucket in batches, returning success per key"""
+        batches = [keys[i:i + S3_DELETE_BATCH_SIZE] for i in range(0, len(keys), S3_DELETE_BATCH_SIZE)]
+        results = {}
+        
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(4, len(batches))) as executor:
+                for batch_results in executor.map(self._delete_batch, batches):
+                    results.update(batch_results)
+        else:
+            for batch in batches:
+                results.update(self._delete_batch(batch))
+        
+        if any(results.values()):
+            self.clear_s3_cache()
+        return results
+
+    def delete_file_from_s3(self, file_key: str) -> bool:
+        """Delete file from S3 bucket"""
+        return self.delete_files_from_s3([file_key])[file_key]
 
     def debug_connection(self) -> Dict[str, Any]:
         """Debug connection and credential information"""
@@ -409,29 +719,39 @@ class AWSAgentChatbot:
             'clients_initialized': {
                 's3_client': hasattr(self, 's3_client'),
                 'bedrock_agent_client': hasattr(self, 'bedrock_agent_client'),
-                'bedrock_agent_runtime_client': hasattr(self, 'bedrock_agent_runtime_client')
+                'bedrock_agent_runtime_client': hasattr(self, 'bedrock_agent_runtime_client'),
+                'sts_client': hasattr(self, 'sts_client')
             }
         }
         
-        # Test each service individually
-        try:
-            if hasattr(self, 's3_client'):
-                # Test S3 access
-                self.s3_client.list_buckets()
-                debug_info['s3_test'] = 'success'
-            else:
-                debug_info['s3_test'] = 'client_not_initialized'
-        except Exception as e:
-            debug_info['s3_test'] = f'error: {str(e)}'
+        # Test each service individually, in parallel
+        def probe(client_attr: str, operation: str) -> str:
+            if not hasattr(self, client_attr):
+                return 'client_not_initialized'
+            try:
+                getattr(getattr(self, client_attr), operation)()
+                return 'success'
+            except Exception as e:
+                return f'error: {str(e)}'
         
-        try:
-            if hasattr(self, 'bedrock_agent_client'):
-                # Test Bedrock Agent access
-                self.bedrock_agent_client.list_agents()
-                debug_info['bedrock_test'] = 'success'
-            else:
-                debug_info['bedrock_test'] = 'client_not_initialized'
-        except Exception as e:
-            debug_info['bedrock_test'] = f'error: {str(e)}'
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Test S3 access
+            s3_future = executor.submit(probe, 's3_client', 'list_buckets')
+            # Test Bedrock Agent access
+            bedrock_future = executor.submit(probe, 'bedrock_agent_client', 'list_agents')
+            debug_info['s3_test'] = s3_future.result()
+            debug_info['bedrock_test'] = bedrock_future.result()
         
         return debug_info
+
+
+@st.cache_resource(show_spinner=False)
+def get_chatbot(region_name: str = 'us-west-2', aws_access_key_id: str = None,
+                aws_secret_access_key: str = None, performance_config: str = "optimized") -> AWSAgentChatbot:
+    """Return a shared AWSAgentChatbot per region/credentials so boto3 clients are built once"""
+    return AWSAgentChatbot(
+        region_name=region_name,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        performance_config=performance_config
+    )
@@ -1,6 +1,9 @@
+import io
 import json
 import boto3
-import datetime
+from datetime import datetime, timezone
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import logging
 
@@ -8,43 +11,67 @@ import logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Bodies at or above this size go through a concurrent multipart upload; smaller ones stay on a single put_object
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True
+)
+
+# Data source IDs by knowledge base; module level so warm Lambda invocations skip list_data_sources
+_DATA_SOURCE_IDS = {}
+
+# (s3, bedrock-agent) clients by (region, max_retries), created on first use and reused by warm invocations
+_CLIENTS = {}
+
+def _get_clients(region_name: str, max_retries: int):
+    """Return the shared S3 and Bedrock Agent clients for a region and retry budget"""
+    clients = _CLIENTS.get((region_name, max_retries))
+    if clients is None:
+        # Configure boto3 with longer timeouts for slow agents
+        config = Config(
+            region_name=region_name,
+            retries={
+                'max_attempts': max_retries,
+                'mode': 'adaptive'
+            },
+            read_timeout=300,  # 5 minutes read timeout
+            connect_timeout=60,  # 1 minute connect timeout
+            max_pool_connections=50
+        )
+        clients = (boto3.client('s3'), boto3.client('bedrock-agent', config=config))
+        _CLIENTS[(region_name, max_retries)] = clients
+    return clients
+
 class AWSAgent:
     def __init__(self, region_name: str = 'us-west-2', 
                  bucket_name: str = 'hackaithon-knowledge-base-us-west-2', 
-                 knowledge_base_id: str = 'CKXZIGUZF8'):
+                 knowledge_base_id: str = 'CKXZIGUZF8',
+                 max_retries: int = 3):
         """Initialize AWS clients"""
         self.region_name = region_name
         self.bucket_name = bucket_name
         self.knowledge_base_id = knowledge_base_id
+        self.max_retries = max_retries
+        self._data_source_id = _DATA_SOURCE_IDS.get(knowledge_base_id)
         self.setup_aws_clients()
-        self.timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H-%M-%SZ")
+        self.timestamp = f"{datetime.now(timezone.utc):%Y-%m-%dT%H-%M-%SZ}"
 
     def setup_aws_clients(self):
         """Initialize AWS service clients"""
         try:
-            # Configure boto3 with longer timeouts for slow agents
-            from botocore.config import Config
-            
-            config = Config(
-                region_name=self.region_name,
-                retries={
-                    'max_attempts': 3,
-                    'mode': 'adaptive'
-                },
-                read_timeout=300,  # 5 minutes read timeout
-                connect_timeout=60,  # 1 minute connect timeout
-                max_pool_connections=50
-            )
-            # Initialize AWS clients
-            self.s3_client = boto3.client('s3')
-            self.bedrock_agent_client = boto3.client('bedrock-agent', config=config)
+            # Reuse the module-level clients (and their connection pools) across invocations
+            self.s3_client, self.bedrock_agent_client = _get_clients(self.region_name, self.max_retries)
             
         except Exception as e:
             logger.error(f"Failed to initialize AWS clients: {str(e)}")
             return {"statusCode": 500, "body": f"Setup failed: {str(e)}"}
 
-    def save_file(self, content: str, content_type: str, file_name: str = None):
-        """Save file to S3 bucket in specified folder"""
+    def save_file(self, content: str, content_type: str, file_name: str = None,
+                  include_presigned: bool = False):
+        """Save file to S3 bucket in specified folder, returning the result dict (serialized by the caller)"""
         try:
             # Use the actual file name with timestamp prefix
             if file_name:
@@ -65,64 +92,66 @@ class AWSAgent:
                 body_content = content
 
             logger.info(f"Uploading file to S3 bucket '{self.bucket_name}' with key '{key}' and content_type '{content_type}'")
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=key,
-                Body=body_content.encode("utf-8"),
-                ContentType=content_type
-            )
+            # Encode once; the bytes are uploaded and their length reported
+            body_bytes = body_content.encode("utf-8")
+            size_bytes = len(body_bytes)
+            if size_bytes < MULTIPART_THRESHOLD:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=body_bytes,
+                    ContentType=content_type
+                )
+            else:
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(body_bytes),
+                    self.bucket_name,
+                    key,
+                    ExtraArgs={'ContentType': content_type},
+                    Config=TRANSFER_CONFIG
+                )
             logger.info("✅ Upload successful.")
 
-            # Generate presigned URL for download (expires in 5 hours)
-            try:
-                download_url = self.s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': self.bucket_name, 'Key': key},
-                    ExpiresIn=18000  # 5 hours in seconds
-                )
-                logger.info(f"Generated presigned URL: {download_url[:100]}...")
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL: {str(e)}")
-                download_url = None
+            # Generate presigned URL for download (expires in 5 hours), only for callers that hand it out
+            download_url = None
+            if include_presigned:
+                try:
+                    download_url = self.s3_client.generate_presigned_url(
+                        'get_object',
+                        Params={'Bucket': self.bucket_name, 'Key': key},
+                        ExpiresIn=18000  # 5 hours in seconds
+                    )
+                    logger.info(f"Generated presigned URL: {download_url[:100]}...")
+                except Exception as e:
+                    logger.error(f"Failed to generate presigned URL: {str(e)}")
 
-            response_body = {
-                'TEXT': {
-                    'body': json.dumps({
-                        "status": "success",
-                        "message": f"✅ File '{file_name or key.split('/')[-1]}' uploaded successfully!",
-                        "file_details": {
-                            "name": file_name or key.split('/')[-1],
-                            "size_bytes": len(body_content.encode("utf-8")),
-                            "type": content_type,
-                            "location": f"S3: {self.bucket_name}/{key}"
-                        },
-                        "download_info": {
-                            "url": download_url,
-                            "instructions": f"Copy and paste this URL in your browser to download: {download_url}" if download_url else f"File saved to S3 bucket '{self.bucket_name}' with key '{key}'. Access via AWS Console or CLI.",
-                            "aws_cli_command": f"aws s3 cp s3://{self.bucket_name}/{key} ./{key.split('/')[-1]}"
-                        }
-                    })
+            return {
+                "status": "success",
+                "message": f"✅ File '{file_name or key.split('/')[-1]}' uploaded successfully!",
+                "file_details": {
+                    "name": file_name or key.split('/')[-1],
+                    "size_bytes": size_bytes,
+                    "type": content_type,
+                    "location": f"S3: {self.bucket_name}/{key}"
+                },
+                "download_info": {
+                    "url": download_url,
+                    "instructions": f"Copy and paste this URL in your browser to download: {download_url}" if download_url else f"File saved to S3 bucket '{self.bucket_name}' with key '{key}'. Access via AWS Console or CLI.",
+                    "aws_cli_command": f"aws s3 cp s3://{self.bucket_name}/{key} ./{key.split('/')[-1]}"
                 }
             }
-
-            return response_body
         
         except Exception as e:
             logger.error("Error uploading to S3: %s", str(e), exc_info=True)
-            response_body = {
-                'TEXT': {
-                    'body': json.dumps({
-                        "status": "error",
-                        "message": f"Upload failed: {str(e)}",
-                        "file_details": None,
-                        "download_info": None
-                    })
-                }
+            return {
+                "status": "error",
+                "message": f"Upload failed: {str(e)}",
+                "file_details": None,
+                "download_info": None
             }
-            return response_body
 
     def sync_knowledge_base(self):
-        """Trigger knowledge base synchronization"""
+        """Trigger knowledge base synchronization, returning the result dict (serialized by the caller)"""
         try:
             logger.info(f"Syncing file to knowledge base '{self.knowledge_base_id}'")
             response = self.bedrock_agent_client.start_ingestion_job(
@@ -133,31 +162,49 @@ class AWSAgent:
             job_id = response['ingestionJob']['ingestionJobId']
             logger.info(f"🔄 Knowledge base sync started. Job ID: {job_id}")
 
-            response_body = {
-                'TEXT': {
-                    'body': json.dumps({
-                        "status": "success",
-                        "message": "File synced successfully.",
-                        "ingestion_Job_Id": job_id
-                    })
-                }
+            return {
+                "status": "success",
+                "message": "File synced successfully.",
+                "ingestion_Job_Id": job_id
             }
-
-            return response_body
             
         except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConflictException':
+                # Bedrock rejects overlapping jobs; the running one started before this file was saved,
+                # so it cannot stand in for a new sync
+                logger.info(f"⏳ Knowledge base sync already running; new file not ingested yet: {str(e)}")
+                return self._sync_pending_response()
             logger.error(f"❌ Failed to sync knowledge base: {str(e)}")
-            return {"statusCode": 500, "body": f"Failed to sync knowledge base: {str(e)}"}
+            return {
+                "status": "error",
+                "message": f"Failed to sync knowledge base: {str(e)}",
+                "ingestion_Job_Id": None
+            }
+    
+    def _sync_pending_response(self):
+        """Result for a sync that could not start because an earlier ingestion job is still running"""
+        return {
+            "status": "pending",
+            "message": "File saved but not yet synced: a knowledge base sync that started before this file was saved "
+                       "is still running. Sync the knowledge base again once it finishes.",
+            "ingestion_Job_Id": None
+        }
     
     def get_data_source_id(self):
         """Get the first data source ID for the knowledge base"""
+        # The data source does not change for a knowledge base, so look it up once
+        if self._data_source_id:
+            return self._data_source_id
+        
         try:
             response = self.bedrock_agent_client.list_data_sources(
                 knowledgeBaseId=self.knowledge_base_id
             )
             
             if response['dataSourceSummaries']:
-                return response['dataSourceSummaries'][0]['dataSourceId']
+                self._data_source_id = response['dataSourceSummaries'][0]['dataSourceId']
+                _DATA_SOURCE_IDS[self.knowledge_base_id] = self._data_source_id
+                return self._data_source_id
             else:
                 logger.error("No data sources found for knowledge base")
                 return None
@@ -1,24 +1,39 @@
+import asyncio
 import json
 import logging
 from aws_agent import AWSAgent
 import mimetypes
+import os
 
 # Set up logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Content types for common extensions; these take precedence over mimetypes' guesses
+_EXT_MAP = {
+    '.md': 'text/markdown',
+    '.json': 'application/json',
+    '.xml': 'application/xml'
+}
+
 def get_content_type(file_name):
+    content_type = _EXT_MAP.get(os.path.splitext(file_name)[1].lower())
+    if content_type:
+        return content_type
     # Try to guess the content type based on the file extension
     content_type, _ = mimetypes.guess_type(file_name)
-    # Fallbacks for common types
-    if file_name.endswith('.md'):
-        return 'text/markdown'
-    if file_name.endswith('.json'):
-        return 'application/json'
-    if file_name.endswith('.xml'):
-        return 'application/xml'
     return content_type or 'application/octet-stream'
 
+async def save_and_sync(client, content, content_type, file_name, include_presigned=True):
+    """Save the file and sync the knowledge base, overlapping the data source lookup with the upload"""
+    # The ingestion job must start after the object exists, but its data source id can be fetched meanwhile
+    upload_response, _ = await asyncio.gather(
+        asyncio.to_thread(client.save_file, content, content_type, file_name, include_presigned),
+        asyncio.to_thread(client.get_data_source_id)
+    )
+    sync_response = await asyncio.to_thread(client.sync_knowledge_base)
+    return upload_response, sync_response
+
 def lambda_handler(event, context):
     logger.info("Lambda invoked with event: %s", json.dumps(event))
 
@@ -48,18 +63,15 @@ def lambda_handler(event, context):
 
     content_type = get_content_type(file_name)
 
-    # Use unified save_file method
-    upload_response = client.save_file(content, content_type, file_name)
-
-    # Sync data source in knowledge base
-    sync_response = client.sync_knowledge_base()
+    # Save with the unified save_file method, then sync data source in knowledge base
+    upload_response, sync_response = asyncio.run(save_and_sync(client, content, content_type, file_name))
     
-    # Combine responses
+    # Combine responses; this is the only place the results are serialized
     response_body = {
         'TEXT': {
             'body': json.dumps({
-                "upload_result": json.loads(upload_response['TEXT']['body']),
-                "sync_result": json.loads(sync_response['TEXT']['body'])
+                "upload_result": upload_response,
+                "sync_result": sync_response
             })
         }
     }
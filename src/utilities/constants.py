@@ -0,0 +1,12 @@
+import re
+
+# Static UI options for main.py. Streamlit re-executes the main script on every rerun,
+# but imported modules only once per process, so these are built a single time.
+AWS_REGIONS = ("us-west-2", "us-east-1", "eu-west-1", "ap-southeast-1")
+NAV_PAGES = ("🤖 Agents", "💬 Chat", "📈 History", "📚 Knowledge Base")
+NAV_INDEX = {page: i for i, page in enumerate(NAV_PAGES)}
+
+# Credential format checks. Only long-term AKIA access keys: temporary ASIA keys also
+# need a session token, which the sidebar does not collect.
+AWS_ACCESS_KEY_RE = re.compile(r'^AKIA[A-Z0-9]{16}$')
+AWS_SECRET_KEY_RE = re.compile(r'^[A-Za-z0-9/+=]{40}$')
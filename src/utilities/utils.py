@@ -1,43 +1,65 @@
+import re
 import uuid
+import threading
 import mimetypes
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# File type icons by MIME major type, checked before the substring rules
+_MIME_MAJOR_ICONS = {
+    'image': '🖼️',
+    'video': '🎥',
+    'audio': '🎵'
+}
+# (substrings, icon) checked in order against the full MIME type
+_MIME_SUBSTRING_ICONS = (
+    (('pdf',), '📄'),
+    (('word', 'document'), '📝'),
+    (('spreadsheet', 'excel'), '📊'),
+    (('presentation', 'powerpoint'), '📺'),
+    (('text',), '📄')
+)
+
+# Literal \n, \t and \r escapes in agent output, unescaped in a single pass
+_ESCAPE_RE = re.compile(r'\\([ntr])')
+_ESC_MAP = {'n': '\n', 't': '\t', 'r': '\r'}
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+_SIZE_DIVISORS = tuple(1024 ** i for i in range(len(_SIZE_UNITS)))
+
+# Characters that are invalid in S3 keys/filenames, each mapped to '_'
+_INVALID_FILENAME_TRANS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+# Pool for background AWS calls from the Streamlit script. It lives here rather than in
+# main.py because Streamlit re-executes the main script (but not imported modules) on every rerun.
+BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="background")
+# Fire-and-forget agent warm-ups get their own small pool so slow invocations never
+# queue ahead of the lookups the script blocks on in BACKGROUND_EXECUTOR
+WARMUP_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
 
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human readable format"""
     if size_bytes == 0:
         return "0B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    
-    return f"{size_bytes:.1f}{size_names[i]}"
+    # Unit index straight from the bit length (10 bits per 1024x), capped at TB
+    i = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if size_bytes >= 1024 else 0
+    return f"{size_bytes / _SIZE_DIVISORS[i]:.1f}{_SIZE_UNITS[i]}"
 
 def get_file_type_icon(filename: str) -> str:
     """Get emoji icon for file type"""
     mime_type, _ = mimetypes.guess_type(filename)
     
     if mime_type:
-        if mime_type.startswith('image/'):
-            return '🖼️'
-        elif mime_type.startswith('video/'):
-            return '🎥'
-        elif mime_type.startswith('audio/'):
-            return '🎵'
-        elif 'pdf' in mime_type:
-            return '📄'
-        elif 'word' in mime_type or 'document' in mime_type:
-            return '📝'
-        elif 'spreadsheet' in mime_type or 'excel' in mime_type:
-            return '📊'
-        elif 'presentation' in mime_type or 'powerpoint' in mime_type:
-            return '📺'
-        elif 'text' in mime_type:
-            return '📄'
+        icon = _MIME_MAJOR_ICONS.get(mime_type.partition('/')[0])
+        if icon:
+            return icon
+        for substrings, icon in _MIME_SUBSTRING_ICONS:
+            if any(sub in mime_type for sub in substrings):
+                return icon
     
     return '📎'
 
@@ -59,14 +81,8 @@ def extract_text_preview(text: str, max_length: int = 200) -> str:
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for S3 storage"""
-    import re
-    # Remove or replace invalid characters for S3
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    
-    # Remove any leading/trailing whitespace and dots
-    filename = filename.strip('. ')
+    # Replace invalid characters for S3 in one pass, then remove any leading/trailing whitespace and dots
+    filename = filename.translate(_INVALID_FILENAME_TRANS).strip('. ')
     
     # Ensure filename is not empty
     if not filename:
@@ -76,16 +92,38 @@ def sanitize_filename(filename: str) -> str:
 
 def display_content_with_formatting(content_str: str):
     """Display content with intelligent formatting"""
-    if not content_str or content_str.strip() == "":
+    # isspace() stops at the first visible character instead of copying the whole string like strip()
+    if not content_str or content_str.isspace():
         st.info("No content returned")
         return
     
-    # Pre-process the content string
-    # Replace \n with actual newlines
-    content_str = content_str.replace('\\n', '\n')
-    # Replace \t with actual tabs
-    content_str = content_str.replace('\\t', '\t')
-    # Handle other special characters
-    content_str = content_str.replace('\\r', '\r')
+    st.markdown(unescape_content(content_str))
+
+def unescape_content(content_str: str) -> str:
+    """Replace literal \\n, \\t and \\r in agent output with actual newlines, tabs and carriage returns"""
+    if '\\' not in content_str:
+        return content_str
+    return _ESCAPE_RE.sub(lambda m: _ESC_MAP[m.group(1)], content_str)
+
+def unescape_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """unescape_content applied to streamed chunks, holding back a trailing backslash until the next chunk"""
+    pending = ''
+    for chunk in chunks:
+        text = pending + chunk
+        pending = ''
+        if text.endswith('\\'):
+            text, pending = text[:-1], '\\'
+        if text:
+            yield unescape_content(text)
+    if pending:
+        yield pending
 
-    st.markdown(content_str)
+def with_script_run_ctx(func):
+    """Wrap func so it runs with the current Streamlit script run context when submitted to a pool"""
+    ctx = get_script_run_ctx()
+    
+    def wrapper(*args, **kwargs):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args, **kwargs)
+    
+    return wrapper